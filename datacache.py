@@ -0,0 +1,180 @@
+"""Memory-aware cache shared by the data apps (datasets + derived artifacts).
+
+One process-wide cache with a global byte budget, size-aware LRU eviction
+and a TTL. Hits return read-only views instead of copies.
+
+Configure with the DATA_CACHE_MAX_MB and DATA_CACHE_TTL_SECONDS environment variables.
+The cache admin panel is shared by every session, so it is only shown when
+DATA_CACHE_ADMIN=1 is set.
+"""
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Cache hits hand out shallow views; with Copy-on-Write (always on from pandas 3)
+# a caller modifying its view gets its own copy instead of corrupting the cache.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+# -------------------------
+# Size estimation + read-only views
+# -------------------------
+def estimate_nbytes(value) -> int:
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+def readonly_view(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=False)
+    if isinstance(value, np.ndarray):
+        view = value.view()
+        view.flags.writeable = False
+        return view
+    if isinstance(value, dict):
+        return {k: readonly_view(v) for k, v in value.items()}
+    return value
+
+def file_digest(file) -> str:
+    # content-based key so re-uploading the same file is a hit
+    return hashlib.blake2b(file.getvalue(), digest_size=16).hexdigest()
+
+# -------------------------
+# Cache
+# -------------------------
+class ByteBudgetCache:
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> dict(value, nbytes, created, hits); oldest use first
+        self._lock = threading.Lock()
+        self.resident_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.rejected = 0
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self.resident_bytes -= entry["nbytes"]
+
+    def _expire(self, now: float):
+        for key in [k for k, e in self._entries.items() if now - e["created"] > self.ttl_seconds]:
+            self._drop(key)
+            self.expirations += 1
+
+    def get_or_compute(self, key, compute, nbytes=None):
+        # nbytes: optional callable sizing values estimate_nbytes can't see into (e.g. engines)
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry["hits"] += 1
+                self.hits += 1
+                return readonly_view(entry["value"])
+            self.misses += 1
+
+        # computed outside the lock so one slow load doesn't block every other session
+        value = compute()
+        nbytes = nbytes(value) if nbytes is not None else estimate_nbytes(value)
+
+        with self._lock:
+            if nbytes > self.max_bytes:
+                self.rejected += 1
+                return value
+            if key in self._entries:
+                self._drop(key)
+            # evict least recently used entries until the new one fits
+            while self._entries and self.resident_bytes + nbytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+            self._entries[key] = {"value": value, "nbytes": nbytes, "created": time.time(), "hits": 0}
+            self.resident_bytes += nbytes
+        return readonly_view(value)
+
+    def resize(self, key, nbytes: int):
+        # for entries that grow after insertion (e.g. an engine gaining indexes)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            self.resident_bytes += nbytes - entry["nbytes"]
+            entry["nbytes"] = nbytes
+            self._entries.move_to_end(key)
+            while self.resident_bytes > self.max_bytes and len(self._entries) > 1:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.resident_bytes = 0
+
+    def entries_table(self) -> pd.DataFrame:
+        # keys are (kind, "<file name>:<content digest>", *labels); only the digest
+        # prefix is shown so one session can't see what others uploaded
+        with self._lock:
+            rows = [
+                {
+                    "kind": " · ".join(str(k) for k in (key[:1] + key[2:])) if isinstance(key, tuple) else str(key),
+                    "digest": str(key[1]).rsplit(":", 1)[-1][:12] if isinstance(key, tuple) and len(key) > 1 else "",
+                    "size_mb": round(e["nbytes"] / 2**20, 2),
+                    "hits": e["hits"],
+                }
+                for key, e in reversed(self._entries.items())
+            ]
+        return pd.DataFrame(rows, columns=["kind", "digest", "size_mb", "hits"])
+
+data_cache = ByteBudgetCache(
+    max_bytes=int(float(os.environ.get("DATA_CACHE_MAX_MB", "1024")) * 2**20),
+    ttl_seconds=float(os.environ.get("DATA_CACHE_TTL_SECONDS", "3600")),
+)
+CACHE_ADMIN_ENABLED = os.environ.get("DATA_CACHE_ADMIN", "").lower() in ("1", "true", "yes")
+
+# -------------------------
+# Admin view
+# -------------------------
+def render_cache_admin(cache: ByteBudgetCache = data_cache):
+    # process-wide stats and a process-wide "Clear cache": operators only
+    if not CACHE_ADMIN_ENABLED:
+        return
+    with st.sidebar.expander("🗄️ Cache admin"):
+        lookups = cache.hits + cache.misses
+        c1, c2 = st.columns(2)
+        c1.metric("Hit rate", f"{cache.hits / lookups:.0%}" if lookups else "–")
+        c2.metric("Entries", len(cache))
+        c1.metric("Hits / Misses", f"{cache.hits} / {cache.misses}")
+        c2.metric("Evicted / Expired", f"{cache.evictions} / {cache.expirations}")
+        st.metric(
+            "Resident",
+            f"{cache.resident_bytes / 2**20:.1f} MB of {cache.max_bytes / 2**20:.0f} MB"
+        )
+        st.progress(min(cache.resident_bytes / cache.max_bytes, 1.0))
+        if cache.rejected:
+            st.caption(f"{cache.rejected} items were larger than the whole budget and were not cached.")
+        st.dataframe(cache.entries_table(), use_container_width=True, hide_index=True)
+        if st.button("Clear cache", key="cache_admin_clear"):
+            cache.clear()
@@ -3,9 +3,104 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import io
+from pandas.tseries.api import guess_datetime_format
 
 st.set_page_config(page_title='Analyze Your Data', layout="wide", page_icon="🪭")
 
+# ─── Chart helpers ─────────────────────────────────────────────────────
+MAX_BARS = 50
+# candidate time buckets, finest first; the first one giving few enough points wins
+TIME_BUCKETS = ["1s", "1min", "5min", "15min", "1h", "6h", "1D", "7D", "30D", "90D", "365D"]
+
+
+def as_datetime(series):
+    # returns the column as datetimes if it holds dates (CSV dates arrive as text), else None
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+        return None
+    sample = series.dropna().head(100)
+    if sample.empty:
+        return None
+    # only a consistent format with a year and a month counts (not "Monday", "Jan", ...)
+    fmt = guess_datetime_format(str(sample.iloc[0]))
+    if fmt is None or not ("%Y" in fmt or "%y" in fmt) or not any(m in fmt for m in ("%m", "%b", "%B")):
+        return None
+    try:
+        pd.to_datetime(sample, format=fmt)
+    except (ValueError, TypeError):
+        return None
+    return pd.to_datetime(series, format=fmt, errors="coerce")
+
+
+def time_bucket(x, y, agg, max_points):
+    frame = pd.DataFrame({"x": x.to_numpy(), "y": y.to_numpy()}).dropna(subset=["x"])
+    if frame.empty:
+        return frame["x"].to_numpy(), frame["y"].to_numpy(), TIME_BUCKETS[0]
+    span = frame["x"].max() - frame["x"].min()
+    rule = next((r for r in TIME_BUCKETS if span / pd.Timedelta(r) <= max_points), TIME_BUCKETS[-1])
+    buckets = frame.set_index("x")["y"].resample(rule)
+    out = buckets.agg(agg)
+    if agg != "count":
+        out = out[buckets.count() > 0]  # empty buckets are gaps, not zeros
+    return out.index.to_numpy(), out.to_numpy(), rule
+
+
+def chart_data(df, x_axis, y_axis, agg, max_points, aggregate):
+    # "auto": bars sum, lines keep the raw points (downsampled later) unless x is categorical
+    x, y = df[x_axis], df[y_axis]
+    if not pd.api.types.is_numeric_dtype(y):
+        agg = "count"
+    elif agg == "auto":
+        agg = "sum" if aggregate else None
+
+    x_dates = as_datetime(x)
+    if x_dates is not None:
+        dropped = int(x_dates.isna().sum() - x.isna().sum())
+        note = f", {dropped:,} rows with unparseable dates dropped" if dropped else ""
+        if agg is None:
+            frame = pd.DataFrame({"x": x_dates, "y": y}).dropna().sort_values("x")
+            return frame["x"].to_numpy(), frame["y"].to_numpy(), "raw points sorted by time" + note
+        xs, ys, rule = time_bucket(x_dates, y, agg, max_points)
+        return xs, ys, f"{agg} of {y_axis} per {rule} bucket" + note
+
+    if agg is not None or not pd.api.types.is_numeric_dtype(x):
+        agg = agg or "mean"
+        grouped = pd.DataFrame({"x": x, "y": y}).groupby("x")["y"].agg(agg)
+        return grouped.index.to_numpy(), grouped.to_numpy(), f"{agg} of {y_axis} per {x_axis}"
+
+    frame = pd.DataFrame({"x": x, "y": y}).dropna().sort_values("x")
+    return frame["x"].to_numpy(), frame["y"].to_numpy(), "raw points sorted by x"
+
+
+def lttb(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: indices of `threshold` points that keep the visual shape
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    idx = np.empty(threshold, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        # average of the next bucket is the third triangle vertex
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
+
+
 st.title("📊 Analyze Your Data")
 st.write("Upload a **CSV** file and explore your data interactively")
 
@@ -78,6 +173,14 @@ if uploaded_file is not None:
     columns = df.columns.tolist()
     x_axis = st.selectbox("Select Column For The X-Axis", options=columns)
     y_axis = st.selectbox("Select Column For The Y-Axis", options=columns)
+    agg = st.selectbox(
+        "Aggregation",
+        options=["auto", "sum", "mean", "count"],
+        help=(
+            "auto: bar graphs sum Y per X; line graphs keep the raw points (LTTB-downsampled) "
+            "and average Y only for categorical X. Non-numeric Y columns are always counted."
+        )
+    )
 
     # Create buttons for chart types
     col1, col2 = st.columns(2)
@@ -94,11 +197,27 @@ if uploaded_file is not None:
     if lin_btn:
         st.write("Line Graph")
         fig, ax = plt.subplots()
-        ax.plot(df[x_axis], df[y_axis], marker="o")
+        # never draw more points than the figure has horizontal pixels
+        max_points = int(fig.get_figwidth() * fig.dpi)
+        xs, ys, how = chart_data(df, x_axis, y_axis, agg, max_points, aggregate=False)
+
+        if len(xs) > max_points:
+            if np.issubdtype(xs.dtype, np.number):
+                x_pos = xs.astype(float)
+            elif np.issubdtype(xs.dtype, np.datetime64):
+                x_pos = xs.astype("datetime64[ns]").astype(np.int64).astype(float)
+            else:
+                x_pos = np.arange(len(xs), dtype=float)
+            keep = lttb(x_pos, ys.astype(float), max_points)
+            xs, ys = xs[keep], ys[keep]
+            how += ", LTTB downsampled"
+
+        ax.plot(xs, ys, marker="o" if len(xs) <= 100 else None)
         ax.set_xlabel(x_axis)
         ax.set_ylabel(y_axis)
         ax.set_title(f"Line Graph of {y_axis} vs {x_axis}")
         st.pyplot(fig)
+        st.caption(f"Raw points: {len(df):,} · rendered points: {len(xs):,} ({how})")
 
     # ----------------------------
     # Plot Bar Chart
@@ -106,8 +225,19 @@ if uploaded_file is not None:
     if bar_btn:
         st.write("Bar Graph")
         fig, ax = plt.subplots()
-        ax.bar(df[x_axis], df[y_axis])
+        xs, ys, how = chart_data(df, x_axis, y_axis, agg, MAX_BARS, aggregate=True)
+
+        if len(xs) > MAX_BARS:
+            # NaN groups (every y missing) rank last, not first
+            ranks = np.argsort(np.nan_to_num(ys.astype(float), nan=-np.inf))
+            top = np.sort(ranks[::-1][:MAX_BARS])
+            xs, ys = xs[top], ys[top]
+            how += f", top {MAX_BARS} bars"
+
+        ax.bar([str(v) for v in xs], ys)
+        ax.tick_params(axis="x", labelrotation=90)
         ax.set_xlabel(x_axis)
         ax.set_ylabel(y_axis)
         ax.set_title(f"Bar Chart of {y_axis} vs {x_axis}")
         st.pyplot(fig)
+        st.caption(f"Raw points: {len(df):,} · rendered bars: {len(xs):,} ({how})")
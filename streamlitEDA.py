@@ -4,22 +4,37 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import io
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from datacache import data_cache, estimate_nbytes, file_digest, render_cache_admin
+
+try:
+    import duckdb
+except ImportError:  # optional: faster columnar engine for SQL mode
+    duckdb = None
 
 st.set_page_config(page_title="EDA App", layout="wide", page_icon="📊")
 
 st.title("📊 Data Science EDA App (Streamlit)")
 st.write("Upload a **CSV** or **Excel** file to explore your dataset.")
+render_cache_admin()
 
 # ---------------------------
 # Helpers
 # ---------------------------
-@st.cache_data
-def load_data(file, file_type: str):
-    if file_type == "csv":
-        return pd.read_csv(file)
-    else:
-        # Excel
-        return pd.read_excel(file)
+def load_data(file, file_type: str, dataset_key: str):
+    def read():
+        if file_type == "csv":
+            return pd.read_csv(file)
+        else:
+            # Excel
+            return pd.read_excel(file)
+    # byte-budgeted shared cache; hits are read-only views, not copies
+    return data_cache.get_or_compute(("dataset", dataset_key), read)
 
 def dataframe_info(df: pd.DataFrame) -> str:
     buffer = io.StringIO()
@@ -32,6 +47,224 @@ def safe_numeric_cols(df: pd.DataFrame):
 def safe_categorical_cols(df: pd.DataFrame):
     return df.select_dtypes(include=["object", "category", "bool"]).columns.tolist()
 
+# ---------------------------
+# Progressive (sampled) EDA helpers
+# ---------------------------
+SAMPLE_ROWS = 100_000
+Z_95 = 1.96
+TOP_N_MAX = 50
+
+def uniform_sample(df: pd.DataFrame, n: int = SAMPLE_ROWS, seed: int = 0) -> pd.DataFrame:
+    # uniform sample of n rows without replacement (the whole frame if it is smaller)
+    if len(df) <= n:
+        return df
+    rng = np.random.default_rng(seed)
+    idx = np.sort(rng.choice(len(df), size=n, replace=False))
+    return df.iloc[idx]
+
+def finite_population_correction(n: int, population: int) -> float:
+    if population <= 1 or n >= population:
+        return 0.0
+    return float(np.sqrt((population - n) / (population - 1)))
+
+def quantile_ci(sorted_values: np.ndarray, q: float, fpc: float):
+    # distribution-free CI from order statistics: rank n*q +/- z*sqrt(n*q*(1-q))
+    n = len(sorted_values)
+    delta = Z_95 * np.sqrt(n * q * (1 - q)) * fpc
+    lo = int(max(0, np.floor(n * q - delta)))
+    hi = int(min(n - 1, np.ceil(n * q + delta)))
+    return sorted_values[lo], sorted_values[hi]
+
+def sampled_numeric_summary(sample: pd.DataFrame, num_cols, population_rows: int) -> pd.DataFrame:
+    rows = {}
+    for c in num_cols:
+        values = np.sort(sample[c].dropna().to_numpy(dtype=float))
+        n = len(values)
+        if n == 0:
+            continue
+        # scale the non-null share of the sample up to the full dataset
+        population = int(round(population_rows * n / len(sample)))
+        fpc = finite_population_correction(n, population)
+        mean = values.mean()
+        std = values.std(ddof=1) if n > 1 else 0.0
+        half = Z_95 * std / np.sqrt(n) * fpc
+        row = {
+            "est_count": population,
+            "mean": mean,
+            "mean_ci_low": mean - half,
+            "mean_ci_high": mean + half,
+            "std": std,
+            "sample_min": values[0],
+        }
+        for q, label in [(0.25, "25%"), (0.5, "50%"), (0.75, "75%")]:
+            lo, hi = quantile_ci(values, q, fpc)
+            row[label] = np.quantile(values, q)
+            row[f"{label}_ci_low"] = lo
+            row[f"{label}_ci_high"] = hi
+        row["sample_max"] = values[-1]
+        rows[c] = row
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+def sampled_proportions(sample: pd.DataFrame, col: str, population_rows: int, top_n: int) -> pd.DataFrame:
+    n = len(sample)
+    counts = sample[col].astype(str).value_counts().head(top_n)
+    p = counts.to_numpy() / n
+    half = Z_95 * np.sqrt(p * (1 - p) / n) * finite_population_correction(n, population_rows)
+    return pd.DataFrame({
+        col: counts.index,
+        "count": np.round(p * population_rows).astype(int),
+        "proportion": p,
+        "ci_low": np.clip(p - half, 0, 1),
+        "ci_high": np.clip(p + half, 0, 1),
+    })
+
+def exact_profile(df: pd.DataFrame, num_cols, cat_cols) -> dict:
+    # full-data statistics; runs in the background worker in progressive mode
+    profile = {
+        "missing": int(df.isnull().sum().sum()),
+        "duplicates": int(df.duplicated().sum()),
+        "num_describe": df[num_cols].describe().T if num_cols else None,
+        "cat_describe": df[cat_cols].describe().T if cat_cols else None,
+        "corr": df[num_cols].corr(numeric_only=True) if len(num_cols) >= 2 else None,
+        "value_counts": {},
+    }
+    for c in cat_cols:
+        vc = df[c].astype(str).value_counts().head(TOP_N_MAX).reset_index()
+        vc.columns = [c, "count"]
+        profile["value_counts"][c] = vc
+    return profile
+
+def cached_sample(key: str, df: pd.DataFrame) -> pd.DataFrame:
+    # drawn once per upload, not on every rerun
+    return data_cache.get_or_compute(("sample", key), lambda: uniform_sample(df))
+
+def cached_exact_profile(key: str, df: pd.DataFrame, num_cols, cat_cols) -> dict:
+    return data_cache.get_or_compute(("profile", key), lambda: exact_profile(df, num_cols, cat_cols))
+
+def corr_heatmap(corr: pd.DataFrame, title: str):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sns.heatmap(corr, annot=True, fmt=".2f", ax=ax)
+    ax.set_title(title)
+    plt.close(fig)  # kept alive by the caller, not by pyplot
+    return fig
+
+def figure_png(fig) -> bytes:
+    # figures are cached as rendered PNG bytes: a live Figure must not be drawn by several sessions at once
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight")
+    return buffer.getvalue()
+
+@st.cache_resource
+def get_executor() -> ThreadPoolExecutor:
+    # shared across sessions so concurrent uploads don't spawn unbounded threads
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="eda-exact")
+
+def submit_exact_profile(key: str, df: pd.DataFrame, num_cols, cat_cols):
+    futures = st.session_state.setdefault("exact_profiles", {})
+    if key not in futures:
+        # only the current upload's job is kept around
+        futures.clear()
+        futures[key] = get_executor().submit(cached_exact_profile, key, df, num_cols, cat_cols)
+    return futures[key]
+
+@st.fragment(run_every=2)
+def watch_exact_profile(future):
+    # rerun the whole page as soon as the exact statistics are ready
+    if future.done():
+        st.rerun()
+    st.caption("⏳ Refining to exact statistics in the background. Sampled estimates will be swapped out automatically.")
+
+# ---------------------------
+# SQL mode helpers
+# ---------------------------
+SQL_TABLE = "data"
+SQL_PAGE_SIZES = [25, 50, 100, 500]
+
+def build_sql_engine(dataset_key: str, df: pd.DataFrame) -> dict:
+    key = ("sql_engine", dataset_key)
+    if duckdb is not None:
+        # no file system / network access from user queries (read_csv, read_text, httpfs, ...)
+        conn = duckdb.connect(config={"enable_external_access": False})
+        conn.register(SQL_TABLE, df)  # zero-copy scan of the loaded frame
+        conn.execute("SET lock_configuration = true")
+        return {"name": "DuckDB", "key": key, "conn": conn, "lock": threading.Lock(), "indexes": set(), "frame": df}
+
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    df.to_sql(SQL_TABLE, conn, index=False, chunksize=10_000)
+    conn.execute("PRAGMA query_only = ON")
+    return {"name": "SQLite", "key": key, "conn": conn, "lock": threading.Lock(), "indexes": set()}
+
+def sql_engine_nbytes(engine: dict) -> int:
+    if engine["name"] == "DuckDB":
+        # the registered frame stays pinned even after the dataset entry is evicted
+        return estimate_nbytes(engine["frame"])
+    conn = engine["conn"]
+    # SQLite holds a full second copy of the data, plus its indexes
+    return conn.execute("PRAGMA page_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0]
+
+def get_sql_engine(dataset_key: str, df: pd.DataFrame) -> dict:
+    # one engine per upload (dataset_key includes a content digest), shared by all
+    # sessions and counted against the cache budget; the lock serialises queries on it
+    return data_cache.get_or_compute(
+        ("sql_engine", dataset_key), lambda: build_sql_engine(dataset_key, df), nbytes=sql_engine_nbytes
+    )
+
+def ensure_sql_indexes(engine: dict, cols):
+    # DuckDB relies on zone maps over the registered frame; explicit indexes are SQLite only
+    if engine["name"] != "SQLite":
+        return
+    missing = [c for c in cols if c not in engine["indexes"]]
+    if not missing:
+        return
+    conn = engine["conn"]
+    with engine["lock"]:
+        conn.execute("PRAGMA query_only = OFF")
+        try:
+            for c in missing:
+                quoted = '"' + str(c).replace('"', '""') + '"'
+                conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{len(engine["indexes"])}" ON {SQL_TABLE} ({quoted})')
+                engine["indexes"].add(c)
+        finally:
+            conn.execute("PRAGMA query_only = ON")
+        nbytes = sql_engine_nbytes(engine)
+    # indexes grow the engine after it was cached
+    data_cache.resize(engine["key"], nbytes)
+
+def validate_sql(sql: str) -> str:
+    # only a trailing separator is dropped; ";" inside literals is fine and
+    # run_sql leaves multi-statement input to the engine's own parser
+    sql = sql.strip().rstrip(";").strip()
+    if not sql:
+        raise ValueError("Please enter a query.")
+    if not re.match(r"^(select|with)\b", sql, flags=re.IGNORECASE):
+        raise ValueError("Only read-only SELECT / WITH queries are allowed.")
+    return sql
+
+def run_sql(engine: dict, sql: str, sql_args=()) -> pd.DataFrame:
+    with engine["lock"]:
+        if engine["name"] == "DuckDB":
+            # DuckDB would run every statement (sqlite3 refuses more than one itself)
+            if len(engine["conn"].extract_statements(sql)) != 1:
+                raise ValueError("Only a single statement is allowed.")
+            return engine["conn"].execute(sql, list(sql_args)).df()
+        return pd.read_sql_query(sql, engine["conn"], params=sql_args)
+
+def sql_row_count(engine: dict, sql: str) -> int:
+    # the newline keeps a trailing "-- comment" in the user's query from swallowing ") AS q"
+    return int(run_sql(engine, f"SELECT COUNT(*) AS n FROM ({sql}\n) AS q").iloc[0, 0])
+
+def sql_page(engine: dict, sql: str, page_size: int, page: int):
+    start = time.perf_counter()
+    result = run_sql(engine, f"SELECT * FROM ({sql}\n) AS q LIMIT ? OFFSET ?", (page_size, page * page_size))
+    return result, time.perf_counter() - start
+
+def sql_plan(engine: dict, sql: str) -> str:
+    if engine["name"] == "DuckDB":
+        plan = run_sql(engine, f"EXPLAIN {sql}")
+        return "\n".join(plan.iloc[:, -1].astype(str))
+    plan = run_sql(engine, f"EXPLAIN QUERY PLAN {sql}")
+    return "\n".join(plan["detail"].astype(str))
+
 # ---------------------------
 # Upload
 # ---------------------------
@@ -43,9 +276,10 @@ if uploaded_file is None:
 
 file_name = uploaded_file.name.lower()
 file_type = "csv" if file_name.endswith(".csv") else "excel"
+dataset_key = f"{uploaded_file.name}:{file_digest(uploaded_file)}"
 
 try:
-    df = load_data(uploaded_file, file_type)
+    df = load_data(uploaded_file, file_type, dataset_key)
 except Exception as e:
     st.error("❌ Unable to read file. Please upload a valid CSV/Excel file.")
     st.exception(e)
@@ -53,6 +287,41 @@ except Exception as e:
 
 st.success("✅ File loaded successfully!")
 
+num_cols = safe_numeric_cols(df)
+cat_cols = safe_categorical_cols(df)
+
+# ---------------------------
+# Progressive mode: sampled estimates first, exact statistics refined in the background
+# ---------------------------
+progressive = st.toggle(
+    f"⚡ Progressive mode (show estimates from a {SAMPLE_ROWS:,}-row sample first)",
+    value=len(df) > SAMPLE_ROWS,
+)
+
+profile = None
+sample = None
+if progressive and len(df) > SAMPLE_ROWS:
+    future = submit_exact_profile(dataset_key, df, num_cols, cat_cols)
+    if future.done():
+        try:
+            profile = future.result()
+            st.caption("✅ Showing exact statistics.")
+        except Exception as e:
+            st.warning("⚠️ Background refinement failed; showing sampled estimates.")
+            st.exception(e)
+            sample = cached_sample(dataset_key, df)
+    else:
+        sample = cached_sample(dataset_key, df)
+        watch_exact_profile(future)
+else:
+    profile = cached_exact_profile(dataset_key, df, num_cols, cat_cols)
+
+if sample is not None:
+    st.info(
+        f"Estimates below are computed on a uniform sample of {len(sample):,} of {len(df):,} rows, "
+        "with 95% confidence intervals."
+    )
+
 # ---------------------------
 # Basic EDA
 # ---------------------------
@@ -63,23 +332,34 @@ st.subheader("2) Basic EDA Summary")
 c1, c2, c3, c4 = st.columns(4)
 c1.metric("Rows", df.shape[0])
 c2.metric("Columns", df.shape[1])
-c3.metric("Missing Values", int(df.isnull().sum().sum()))
-c4.metric("Duplicate Records", int(df.duplicated().sum()))
+if profile is not None:
+    c3.metric("Missing Values", profile["missing"])
+    c4.metric("Duplicate Records", profile["duplicates"])
+else:
+    missing_share = sample.isnull().to_numpy().sum() / len(sample)
+    c3.metric("Missing Values (est.)", f"≈ {int(round(missing_share * len(df))):,}")
+    c4.metric("Duplicate Records", "refining…")
 
 st.subheader("3) Info (df.info())")
 st.text(dataframe_info(df))
 
 st.subheader("4) Describe (Numerical)")
-num_cols = safe_numeric_cols(df)
 if len(num_cols) > 0:
-    st.dataframe(df[num_cols].describe().T, use_container_width=True)
+    if profile is not None:
+        st.dataframe(profile["num_describe"], use_container_width=True)
+    else:
+        st.dataframe(sampled_numeric_summary(sample, num_cols, len(df)), use_container_width=True)
+        st.caption("Sampled estimates with 95% CIs; min/max are sample extremes.")
 else:
     st.warning("No numerical columns found.")
 
 st.subheader("5) Describe (Categorical)")
-cat_cols = safe_categorical_cols(df)
 if len(cat_cols) > 0:
-    st.dataframe(df[cat_cols].describe().T, use_container_width=True)
+    if profile is not None:
+        st.dataframe(profile["cat_describe"], use_container_width=True)
+    else:
+        st.dataframe(sample[cat_cols].describe().T, use_container_width=True)
+        st.caption("Computed on the sample; `unique` is a lower bound for the full dataset.")
 else:
     st.warning("No categorical columns found.")
 
@@ -98,6 +378,11 @@ st.dataframe(view_df.head(), use_container_width=True)
 # ---------------------------
 st.subheader("7) Visualizations (Seaborn + Matplotlib)")
 
+# while exact statistics are still being refined, plots use the sample too
+plot_df = df if sample is None else sample
+if sample is not None:
+    st.caption(f"Plots below use the {len(sample):,}-row sample.")
+
 tabs = st.tabs(["Histogram", "Boxplot", "Countplot", "Scatterplot", "Correlation Heatmap"])
 
 # Histogram
@@ -110,7 +395,7 @@ with tabs[0]:
         bins = st.slider("Bins", 5, 100, 30, key="hist_bins")
 
         fig, ax = plt.subplots()
-        sns.histplot(df[col].dropna(), bins=bins, kde=True, ax=ax)
+        sns.histplot(plot_df[col].dropna(), bins=bins, kde=True, ax=ax)
         ax.set_title(f"Histogram: {col}")
         st.pyplot(fig, use_container_width=True)
 
@@ -123,7 +408,7 @@ with tabs[1]:
         col = st.selectbox("Select numeric column", num_cols, key="box_col")
 
         fig, ax = plt.subplots()
-        sns.boxplot(x=df[col], ax=ax)
+        sns.boxplot(x=plot_df[col], ax=ax)
         ax.set_title(f"Boxplot: {col}")
         st.pyplot(fig, use_container_width=True)
 
@@ -136,14 +421,20 @@ with tabs[2]:
         col = st.selectbox("Select categorical column", cat_cols, key="count_col")
         top_n = st.slider("Show top N categories", 5, 50, 10, key="count_topn")
 
-        vc = df[col].astype(str).value_counts().head(top_n).index
-        plot_df = df[df[col].astype(str).isin(vc)]
+        if profile is not None:
+            vc_df = profile["value_counts"][col].head(top_n)
+        else:
+            vc_df = sampled_proportions(sample, col, len(df), top_n)
 
         fig, ax = plt.subplots()
-        sns.countplot(data=plot_df, y=col, order=plot_df[col].astype(str).value_counts().index, ax=ax)
+        sns.barplot(data=vc_df, x="count", y=col, order=vc_df[col], ax=ax)
         ax.set_title(f"Countplot (Top {top_n}): {col}")
         st.pyplot(fig, use_container_width=True)
 
+        if sample is not None:
+            st.caption("Estimated counts (sample proportion × rows) with 95% CIs on the proportion:")
+            st.dataframe(vc_df, use_container_width=True)
+
 # Scatterplot
 with tabs[3]:
     st.markdown("### Scatterplot (Numeric vs Numeric)")
@@ -154,7 +445,7 @@ with tabs[3]:
         y = st.selectbox("Y-axis", num_cols, key="scat_y")
 
         fig, ax = plt.subplots()
-        sns.scatterplot(data=df, x=x, y=y, ax=ax)
+        sns.scatterplot(data=plot_df, x=x, y=y, ax=ax)
         ax.set_title(f"Scatterplot: {y} vs {x}")
         st.pyplot(fig, use_container_width=True)
 
@@ -164,12 +455,16 @@ with tabs[4]:
     if len(num_cols) < 2:
         st.info("Need at least 2 numeric columns for correlation heatmap.")
     else:
-        corr = df[num_cols].corr(numeric_only=True)
-
-        fig, ax = plt.subplots(figsize=(10, 6))
-        sns.heatmap(corr, annot=True, fmt=".2f", ax=ax)
-        ax.set_title("Correlation Heatmap")
-        st.pyplot(fig, use_container_width=True)
+        if profile is not None:
+            png = data_cache.get_or_compute(
+                ("figure", dataset_key, "corr"),
+                lambda: figure_png(corr_heatmap(profile["corr"], "Correlation Heatmap"))
+            )
+            st.image(png, use_container_width=True)
+        else:
+            corr = sample[num_cols].corr(numeric_only=True)
+            fig = corr_heatmap(corr, "Correlation Heatmap (sampled estimate)")
+            st.pyplot(fig, use_container_width=True)
 
 # ---------------------------
 # Query Section (Assignment Part F)
@@ -178,7 +473,7 @@ st.subheader("8) Query Section (Return DataFrame Results)")
 
 st.markdown("Choose a query type OR type a query in simple English (limited rules).")
 
-query_mode = st.radio("Query input mode", ["Guided (Recommended)", "Free text"], horizontal=True)
+query_mode = st.radio("Query input mode", ["Guided (Recommended)", "Free text", "SQL"], horizontal=True)
 
 # ---- Guided queries ----
 if query_mode == "Guided (Recommended)":
@@ -225,7 +520,7 @@ if query_mode == "Guided (Recommended)":
             st.caption(f"Returned {len(result)} rows.")
 
 # ---- Free text queries (simple parser) ----
-else:
+elif query_mode == "Free text":
     user_query = st.text_input("Type your query (examples below):")
     st.caption("Examples: 'show me top 5 categories' | 'show records where customer initiated more than 5 customer service calls'")
 
@@ -263,3 +558,72 @@ else:
 
         else:
             st.warning("Query not recognized. Use Guided mode or follow the example queries exactly.")
+
+# ---- SQL queries (embedded engine) ----
+else:
+    try:
+        engine = get_sql_engine(dataset_key, df)
+    except Exception as e:
+        st.error("❌ Could not load the dataset into the SQL engine.")
+        st.exception(e)
+        st.stop()
+
+    st.caption(
+        f"Engine: **{engine['name']}** · table: `{SQL_TABLE}` · columns: "
+        + ", ".join(f"`{c}`" for c in df.columns)
+    )
+
+    if engine["name"] == "SQLite":
+        index_cols = st.multiselect(
+            "Index columns used in WHERE / GROUP BY / ORDER BY",
+            df.columns.tolist(),
+            key="sql_index_cols"
+        )
+        ensure_sql_indexes(engine, index_cols)
+
+    sql_text = st.text_area(
+        "SQL query",
+        value=f"SELECT * FROM {SQL_TABLE} LIMIT 100",
+        height=120,
+        key="sql_text"
+    )
+    if st.button("Run SQL"):
+        try:
+            sql = validate_sql(sql_text)
+            st.session_state.sql_query = sql
+            st.session_state.sql_total = sql_row_count(engine, sql)
+            st.session_state.sql_page = 1
+            st.session_state.sql_results = {}
+        except Exception as e:
+            st.session_state.pop("sql_query", None)
+            st.error(f"❌ {e}")
+
+    # kept in session_state so paging doesn't need the button pressed again
+    if st.session_state.get("sql_query"):
+        sql = st.session_state.sql_query
+        total = st.session_state.sql_total
+
+        p1, p2 = st.columns(2)
+        page_size = p1.selectbox("Rows per page", SQL_PAGE_SIZES, key="sql_page_size")
+        n_pages = max(1, -(-total // page_size))
+        # a larger page size can leave the current page past the end
+        if st.session_state.get("sql_page", 1) > n_pages:
+            st.session_state.sql_page = n_pages
+        page = p2.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, step=1, key="sql_page")
+
+        # the engine is shared by every session, so each page/plan is fetched once, not per rerun
+        results = st.session_state.setdefault("sql_results", {})
+        try:
+            if (sql, page_size, page) not in results:
+                results[(sql, page_size, page)] = sql_page(engine, sql, page_size, page - 1)
+            if (sql, "plan") not in results:
+                results[(sql, "plan")] = sql_plan(engine, sql)
+        except Exception as e:
+            st.error(f"❌ {e}")
+        else:
+            result, elapsed = results[(sql, page_size, page)]
+            st.dataframe(result, use_container_width=True)
+            st.caption(f"Returned {total} rows · page {page}/{n_pages} fetched in {elapsed * 1000:.1f} ms.")
+
+            with st.expander("Query plan"):
+                st.code(results[(sql, "plan")], language="text")
@@ -1,30 +1,168 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from datacache import data_cache, file_digest, render_cache_admin
 
 st.set_page_config(page_title="Data Cleaning App", layout="wide", page_icon="🧹")
 
 st.title("🧹 Data Cleaning App (Streamlit)")
 st.write("Upload a **CSV** or **Excel** file, clean it, and download the cleaned version.")
+render_cache_admin()
 
 # -------------------------
 # Helpers
 # -------------------------
-@st.cache_data
-def load_file(file, file_name: str) -> pd.DataFrame:
-    file_name = file_name.lower()
-    if file_name.endswith(".csv"):
-        return pd.read_csv(file)
-    return pd.read_excel(file)  # supports .xlsx / .xls
-
-def init_clean_df(df: pd.DataFrame):
-    # store a working copy in session_state so buttons can modify it
-    if "clean_df" not in st.session_state:
-        st.session_state.clean_df = df.copy()
-
-def missing_summary(df: pd.DataFrame) -> pd.DataFrame:
-    ms = df.isnull().sum()
-    ms = ms[ms > 0].sort_values(ascending=False)
+def load_file(file, file_name: str, dataset_key: str) -> pd.DataFrame:
+    def read():
+        if file_name.lower().endswith(".csv"):
+            return pd.read_csv(file)
+        return pd.read_excel(file)  # supports .xlsx / .xls
+    # byte-budgeted shared cache; hits are read-only views, not copies
+    return data_cache.get_or_compute(("dataset", dataset_key), read)
+
+def init_clean_df(df: pd.DataFrame, dataset_key: str):
+    # store a working copy in session_state so buttons can modify it;
+    # uploading a different file replaces the workspace
+    if st.session_state.get("clean_dataset_key") != dataset_key:
+        reset_clean_df(df, dataset_key)
+
+def reset_clean_df(df: pd.DataFrame, dataset_key: str):
+    st.session_state.setdefault("jobs", {})
+    cancel_all_jobs()
+    st.session_state.clean_dataset_key = dataset_key
+    st.session_state.clean_df = df.copy()
+    # quality metrics travel with the data and are updated by delta on each commit
+    st.session_state.clean_quality = data_cache.get_or_compute(
+        ("quality", dataset_key), lambda: build_quality(df)
+    )
+    # bumped on every commit so jobs started on an older version (or file) are discarded
+    st.session_state.clean_version = st.session_state.get("clean_version", -1) + 1
+
+# -------------------------
+# Data-quality metrics (maintained incrementally)
+# -------------------------
+# A quality dict is never mutated; each cleaning step derives a new one.
+#   null_mask    - bit-packed null mask, one row per column, 8 data rows per byte
+#   null_counts  - missing values per column
+#   hashes       - one 64-bit hash per row, positionally aligned with the frame
+#   group_sizes  - rows per distinct hash, i.e. the duplicate-group structure
+
+# set bits in every possible byte, for popcounts over packed masks
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def pack_null_mask(df: pd.DataFrame) -> np.ndarray:
+    # built column by column so no full boolean frame is ever materialised
+    mask = np.zeros((df.shape[1], (len(df) + 7) // 8), dtype=np.uint8)
+    for i in range(df.shape[1]):
+        mask[i] = np.packbits(df.iloc[:, i].isnull().to_numpy())
+    return mask
+
+def popcount(packed: np.ndarray) -> np.ndarray:
+    return POPCOUNT[packed].sum(axis=-1, dtype=np.int64)
+
+def row_null_mask(mask: np.ndarray, how: str) -> np.ndarray:
+    # packed mask of rows with ANY / ALL of the given columns missing
+    if mask.shape[0] == 0:
+        return np.zeros(mask.shape[1], dtype=np.uint8)
+    op = np.bitwise_or if how == "any" else np.bitwise_and
+    return op.reduce(mask, axis=0)
+
+def unpack_rows(packed_row: np.ndarray, n_rows: int) -> np.ndarray:
+    return np.unpackbits(packed_row, count=n_rows).astype(bool)
+
+def select_mask_rows(mask: np.ndarray, keep: np.ndarray) -> np.ndarray:
+    out = np.zeros((mask.shape[0], (int(keep.sum()) + 7) // 8), dtype=np.uint8)
+    for i in range(mask.shape[0]):
+        out[i] = np.packbits(np.unpackbits(mask[i], count=len(keep))[keep])
+    return out
+
+def build_quality(df: pd.DataFrame) -> dict:
+    mask = pack_null_mask(df)
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return {
+        "null_mask": mask,
+        "null_counts": pd.Series(popcount(mask), index=df.columns),
+        "hashes": hashes,
+        "group_sizes": pd.Series(hashes).value_counts(),
+    }
+
+def duplicate_count(quality: dict) -> int:
+    return len(quality["hashes"]) - len(quality["group_sizes"])
+
+def update_groups(group_sizes: pd.Series, removed: np.ndarray, added: np.ndarray = None) -> pd.Series:
+    # adjusts the groups that lost or gained rows (index alignment still walks every group)
+    out = group_sizes.sub(pd.Series(removed).value_counts(), fill_value=0)
+    if added is not None and len(added) > 0:
+        out = out.add(pd.Series(added).value_counts(), fill_value=0)
+    return out[out > 0].astype(np.int64)
+
+def quality_after_drop(quality: dict, keep: np.ndarray) -> dict:
+    removed = np.packbits(~keep)
+    return {
+        "null_mask": select_mask_rows(quality["null_mask"], keep),
+        "null_counts": quality["null_counts"] - popcount(quality["null_mask"] & removed),
+        "hashes": quality["hashes"][keep],
+        "group_sizes": update_groups(quality["group_sizes"], quality["hashes"][~keep]),
+    }
+
+def quality_after_fill(quality: dict, work: pd.DataFrame, filled_pos, changed: np.ndarray) -> dict:
+    null_mask = quality["null_mask"].copy()
+    null_mask[filled_pos] = 0
+    null_counts = quality["null_counts"].copy()
+    null_counts.iloc[filled_pos] = 0
+    hashes = quality["hashes"].copy()
+    old = hashes[changed]
+    hashes[changed] = pd.util.hash_pandas_object(work.iloc[changed], index=False).to_numpy()
+    return {
+        "null_mask": null_mask,
+        "null_counts": null_counts,
+        "hashes": hashes,
+        "group_sizes": update_groups(quality["group_sizes"], old, hashes[changed]),
+    }
+
+def co_missing_matrix(quality: dict) -> pd.DataFrame:
+    # rows where both columns are missing: popcount(mask_i & mask_j)
+    cols = np.flatnonzero(quality["null_counts"].to_numpy() > 0)
+    mask = quality["null_mask"][cols]
+    names = quality["null_counts"].index[cols]
+    matrix = np.array([popcount(mask[i] & mask) for i in range(len(cols))]).reshape(len(cols), len(cols))
+    return pd.DataFrame(matrix, index=names, columns=names)
+
+def missing_patterns(quality: dict, top_n: int = 10) -> pd.DataFrame:
+    # which combinations of columns go missing together, most frequent first
+    n_rows = len(quality["hashes"])
+    cols = np.flatnonzero(quality["null_counts"].to_numpy() > 0)
+    mask = quality["null_mask"][cols]
+    rows = np.flatnonzero(unpack_rows(row_null_mask(mask, "any"), n_rows))
+    if len(rows) == 0:
+        return pd.DataFrame()
+    bits = np.stack([np.unpackbits(m, count=n_rows)[rows] for m in mask])
+    patterns, counts = np.unique(bits, axis=1, return_counts=True)
+    order = np.argsort(counts)[::-1][:top_n]
+    table = pd.DataFrame(
+        np.where(patterns[:, order].T == 1, "✗", ""),
+        columns=quality["null_counts"].index[cols]
+    )
+    table["rows"] = counts[order]
+    table["share"] = (counts[order] / n_rows).round(4)
+    return table
+
+def version_cached(name: str, compute):
+    # derived views are computed once per data version, not on every rerun
+    cache = st.session_state.setdefault("version_cache", {})
+    key = (name, st.session_state.clean_version)
+    if key not in cache:
+        for old in [k for k in cache if k[1] != key[1]]:
+            del cache[old]
+        cache[key] = compute()
+    return cache[key]
+
+def missing_summary(null_counts: pd.Series) -> pd.DataFrame:
+    ms = null_counts[null_counts > 0].sort_values(ascending=False)
     return ms.reset_index().rename(columns={"index": "column", 0: "missing_count"})
 
 def get_num_cols(df: pd.DataFrame):
@@ -33,6 +171,149 @@ def get_num_cols(df: pd.DataFrame):
 def get_cat_cols(df: pd.DataFrame):
     return df.select_dtypes(include=["object", "category", "bool"]).columns.tolist()
 
+# -------------------------
+# Background cleaning jobs
+# -------------------------
+class JobCancelled(Exception):
+    pass
+
+@st.cache_resource
+def get_executor() -> ThreadPoolExecutor:
+    # shared across sessions; threads avoid pickling the frame into another process
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="cleaning-job")
+
+def check_cancel(job: dict):
+    if job["cancel"].is_set():
+        raise JobCancelled()
+
+def run_dropna(df: pd.DataFrame, quality: dict, job: dict, how: str):
+    # answered from the null-mask index with bitwise ops, no rescan of the frame
+    check_cancel(job)
+    keep = ~unpack_rows(row_null_mask(quality["null_mask"], how), len(df))
+    job["progress"] = 0.5
+    check_cancel(job)
+    new_quality = quality_after_drop(quality, keep)
+    return df[keep], new_quality, f"Rows: {len(df)} → {int(keep.sum())}"
+
+def run_fill(df: pd.DataFrame, quality: dict, job: dict, fill_mode: str, fill_cols: tuple):
+    work = df.copy()
+
+    target_cols = list(fill_cols) if len(fill_cols) > 0 else work.columns.tolist()
+    # only columns that actually have gaps need touching (O(columns) lookup)
+    target_cols = [c for c in target_cols if quality["null_counts"][c] > 0]
+    filled_cols = []
+    unfillable = []
+
+    for i, c in enumerate(target_cols):
+        check_cancel(job)
+        job["progress"] = i / len(target_cols)
+
+        if pd.api.types.is_numeric_dtype(work[c]):
+            if fill_mode.startswith("Fill numeric with MEAN"):
+                value = work[c].mean()
+            else:
+                value = work[c].median()
+        else:
+            # MODE for categorical/others
+            mode_series = work[c].mode(dropna=True)
+            value = mode_series.iloc[0] if len(mode_series) > 0 else "Unknown"
+
+        # an entirely empty numeric column has no mean/median; leave it (and its metrics) as is
+        if pd.isna(value):
+            unfillable.append(c)
+            continue
+        work[c] = work[c].fillna(value)
+        filled_cols.append(c)
+
+    # only columns that were really filled get their nulls cleared and their rows rehashed
+    filled_pos = [work.columns.get_loc(c) for c in filled_cols]
+    changed = np.flatnonzero(unpack_rows(row_null_mask(quality["null_mask"][filled_pos], "any"), len(work)))
+    new_quality = quality_after_fill(quality, work, filled_pos, changed)
+
+    message = "Missing values handled successfully!"
+    if unfillable:
+        message += f" Not filled (no values to compute from): {', '.join(map(str, unfillable))}."
+    return work, new_quality, message
+
+def run_drop_duplicates(df: pd.DataFrame, quality: dict, job: dict):
+    # the row hashes are already maintained with the data, so nothing is rehashed here;
+    # only rows sharing a hash can be duplicates, and those are confirmed exactly
+    candidates = pd.Series(quality["hashes"]).duplicated(keep=False).to_numpy()
+    check_cancel(job)
+    job["progress"] = 0.5
+    dup = np.zeros(len(df), dtype=bool)
+    dup[candidates] = df[candidates].duplicated().to_numpy()
+    keep = ~dup
+    new_quality = quality_after_drop(quality, keep)
+    return df[keep], new_quality, f"Rows: {len(df)} → {int(keep.sum())}"
+
+JOB_OPERATIONS = {
+    "dropna": ("Remove missing values", run_dropna),
+    "fill": ("Handle missing values", run_fill),
+    "drop_duplicates": ("Remove duplicate rows", run_drop_duplicates),
+}
+
+def submit_job(op: str, **params):
+    # jobs run one at a time: while one is in flight (identical or not) it is returned instead,
+    # so every operation starts from the version the previous one committed
+    if st.session_state.jobs:
+        return next(iter(st.session_state.jobs.values())), False
+
+    label, func = JOB_OPERATIONS[op]
+    job = {
+        "id": uuid.uuid4().hex[:8],
+        "label": label,
+        "version": st.session_state.clean_version,
+        "progress": 0.0,
+        "cancel": threading.Event(),
+    }
+    job["future"] = get_executor().submit(
+        func, st.session_state.clean_df, st.session_state.clean_quality, job, **params
+    )
+    st.session_state.jobs[job["id"]] = job
+    return job, True
+
+def commit_finished_jobs():
+    # results are swapped in here, on the script thread, in a single assignment
+    for job_id, job in list(st.session_state.jobs.items()):
+        if not job["future"].done():
+            continue
+        del st.session_state.jobs[job_id]
+        name = f"{job['label']} (job {job_id})"
+        try:
+            result, quality, message = job["future"].result()
+        except JobCancelled:
+            st.info(f"⏹️ {name} cancelled.")
+            continue
+        except Exception as e:
+            st.error(f"❌ {name} failed.")
+            st.exception(e)
+            continue
+        if job["version"] != st.session_state.clean_version:
+            st.warning(f"⚠️ {name} discarded: the data changed while it was running. Please run it again.")
+            continue
+        st.session_state.clean_df = result
+        st.session_state.clean_quality = quality
+        st.session_state.clean_version += 1
+        st.success(f"✅ {name} done! {message}")
+
+def cancel_all_jobs():
+    for job in st.session_state.jobs.values():
+        job["cancel"].set()
+
+@st.fragment(run_every=1)
+def job_panel():
+    jobs = st.session_state.jobs
+    # a finished job needs a full rerun so the workspace and metrics pick it up
+    if any(job["future"].done() for job in jobs.values()):
+        st.rerun()
+    for job_id, job in list(jobs.items()):
+        c1, c2 = st.columns([4, 1])
+        status = "cancelling…" if job["cancel"].is_set() else f"{job['progress']:.0%}"
+        c1.progress(job["progress"], text=f"⏳ {job['label']} (job {job_id}) — {status}")
+        if c2.button("Cancel", key=f"cancel_{job_id}", disabled=job["cancel"].is_set()):
+            job["cancel"].set()
+
 # -------------------------
 # Upload
 # -------------------------
@@ -42,15 +323,18 @@ if uploaded is None:
     st.info("Upload a file to start cleaning.")
     st.stop()
 
+dataset_key = f"{uploaded.name}:{file_digest(uploaded)}"
+
 try:
-    df = load_file(uploaded, uploaded.name)
+    df = load_file(uploaded, uploaded.name, dataset_key)
 except Exception as e:
     st.error("❌ Could not read the file. Please upload a valid CSV/Excel file.")
     st.exception(e)
     st.stop()
 
 # Init working df
-init_clean_df(df)
+init_clean_df(df, dataset_key)
+commit_finished_jobs()
 
 st.subheader("1) Original Data Preview")
 st.dataframe(df.head(), use_container_width=True)
@@ -60,6 +344,7 @@ st.dataframe(df.head(), use_container_width=True)
 # -------------------------
 st.subheader("2) Cleaning Workspace (Current Clean Data)")
 clean_df = st.session_state.clean_df
+quality = st.session_state.clean_quality
 st.dataframe(clean_df.head(), use_container_width=True)
 
 # -------------------------
@@ -70,17 +355,23 @@ st.subheader("3) Missing Values & Duplicate Records")
 colA, colB, colC, colD = st.columns(4)
 colA.metric("Rows", clean_df.shape[0])
 colB.metric("Columns", clean_df.shape[1])
-colC.metric("Total Missing Values", int(clean_df.isnull().sum().sum()))
-colD.metric("Duplicate Rows", int(clean_df.duplicated().sum()))
+colC.metric("Total Missing Values", int(quality["null_counts"].sum()))
+colD.metric("Duplicate Rows", duplicate_count(quality))
 
-ms_table = missing_summary(clean_df)
+ms_table = missing_summary(quality["null_counts"])
 if ms_table.empty:
     st.success("✅ No missing values found.")
 else:
     st.write("Missing values by column:")
     st.dataframe(ms_table, use_container_width=True)
 
-dup_count = int(clean_df.duplicated().sum())
+    with st.expander("🧬 Missingness patterns"):
+        st.write("Co-missingness (rows where both columns are missing):")
+        st.dataframe(version_cached("co_missing", lambda: co_missing_matrix(quality)), use_container_width=True)
+        st.write("Most common missingness patterns (✗ = missing):")
+        st.dataframe(version_cached("patterns", lambda: missing_patterns(quality)), use_container_width=True)
+
+dup_count = duplicate_count(quality)
 if dup_count == 0:
     st.success("✅ No duplicate rows found.")
 else:
@@ -91,6 +382,11 @@ else:
 # -------------------------
 st.subheader("4) Cleaning Actions")
 
+# one job at a time: each operation must start from the version the previous one produced
+busy = bool(st.session_state.jobs)
+if busy:
+    st.info("⏳ A cleaning job is running. Actions are disabled until it finishes or is cancelled.")
+
 left, right = st.columns(2)
 
 with left:
@@ -100,14 +396,15 @@ with left:
         ["Drop rows with ANY missing values", "Drop rows where ALL values are missing"],
         key="drop_how"
     )
-    if st.button("🗑️ Remove Missing Values", key="btn_drop_missing"):
-        before = len(st.session_state.clean_df)
-        if drop_how == "Drop rows with ANY missing values":
-            st.session_state.clean_df = st.session_state.clean_df.dropna()
+    how = "any" if drop_how == "Drop rows with ANY missing values" else "all"
+    n_match = version_cached(f"drop_{how}", lambda: int(popcount(row_null_mask(quality["null_mask"], how))))
+    st.caption(f"{n_match} rows match this rule.")
+    if st.button("🗑️ Remove Missing Values", key="btn_drop_missing", disabled=busy):
+        job, started = submit_job("dropna", how=how)
+        if not started:
+            st.info(f"Already running: {job['label']} (job {job['id']}).")
         else:
-            st.session_state.clean_df = st.session_state.clean_df.dropna(how="all")
-        after = len(st.session_state.clean_df)
-        st.success(f"✅ Done! Rows: {before} → {after}")
+            st.rerun()  # redraw with the actions disabled
 
 with right:
     st.markdown("### B) Handle Missing Values (Fill)")
@@ -127,46 +424,33 @@ with right:
         key="fill_cols"
     )
 
-    if st.button("🧩 Handle Missing Values (Fill)", key="btn_fill_missing"):
-        work = st.session_state.clean_df.copy()
-
-        target_cols = fill_cols if len(fill_cols) > 0 else work.columns.tolist()
-
-        for c in target_cols:
-            if work[c].isnull().sum() == 0:
-                continue
-
-            if pd.api.types.is_numeric_dtype(work[c]):
-                if fill_mode.startswith("Fill numeric with MEAN"):
-                    value = work[c].mean()
-                else:
-                    value = work[c].median()
-                work[c] = work[c].fillna(value)
-
-            else:
-                # MODE for categorical/others
-                mode_series = work[c].mode(dropna=True)
-                value = mode_series.iloc[0] if len(mode_series) > 0 else "Unknown"
-                work[c] = work[c].fillna(value)
-
-        st.session_state.clean_df = work
-        st.success("✅ Missing values handled successfully!")
+    if st.button("🧩 Handle Missing Values (Fill)", key="btn_fill_missing", disabled=busy):
+        job, started = submit_job("fill", fill_mode=fill_mode, fill_cols=tuple(fill_cols))
+        if not started:
+            st.info(f"Already running: {job['label']} (job {job['id']}).")
+        else:
+            st.rerun()  # redraw with the actions disabled
 
 st.markdown("---")
 
 st.markdown("### C) Remove Duplicate Rows")
-if st.button("🧽 Remove Duplicate Values", key="btn_remove_dups"):
-    before = len(st.session_state.clean_df)
-    st.session_state.clean_df = st.session_state.clean_df.drop_duplicates()
-    after = len(st.session_state.clean_df)
-    st.success(f"✅ Done! Rows: {before} → {after}")
+if st.button("🧽 Remove Duplicate Values", key="btn_remove_dups", disabled=busy):
+    job, started = submit_job("drop_duplicates")
+    if not started:
+        st.info(f"Already running: {job['label']} (job {job['id']}).")
+    else:
+        st.rerun()  # redraw with the actions disabled
+
+# Running jobs (polls until they finish; results are committed on the next rerun)
+if st.session_state.jobs:
+    job_panel()
 
 st.markdown("---")
 
 # Optional: Reset
 with st.expander("Reset options"):
     if st.button("↩️ Reset to Original Data"):
-        st.session_state.clean_df = df.copy()
+        reset_clean_df(df, dataset_key)
         st.success("Reset complete. Now using original data again.")
 
 # -------------------------